@@ -13,10 +13,96 @@ James Kola
 
 # Import necessary libraries
 import numpy as np
-import pandas as pd
-import cryptpandas as crp
-from scipy import interpolate
-from functools import reduce
+from dataclasses import dataclass
+from functools import lru_cache
+from math import comb
+
+
+@lru_cache(maxsize=1)
+def _load_packets():
+    """
+    Loads the manually sampled data once and turns it into a multiplier lookup table per number of bombs.
+
+    The result is cached for the lifetime of the process, so repeated scenarios
+    (e.g. Streamlit reruns) skip the file I/O entirely.
+    :return: packets (dict) mapping number of bombs to an array of multipliers indexed by spaces
+    """
+    # A for number of bombs, B for spaces, C for collected payouts.
+    # Rows are sorted by A then B, and offsets marks where each number of bombs starts.
+    with np.load('assets/dmsc.npz') as smcd:
+        bombs, spaces, payouts, offsets = smcd['A'], smcd['B'], smcd['C'], smcd['offsets']
+
+    # Create a dictionary to store the manually collected data
+    packets = {}
+
+    for start, stop in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        num_bombs = int(bombs[start])
+        xs = spaces[start:stop].astype(np.float64)
+        ys = payouts[start:stop]
+
+        # Evaluate the samples at every whole number of spaces up to the largest one sampled
+        lut = _interpolate(np.arange(int(xs[-1]) + 1), xs, ys)
+
+        # The table is shared between callers through the cache
+        lut.setflags(write=False)
+
+        # num_bombs is the key, then the multipliers are the values.
+        packets[num_bombs] = lut
+
+    return packets
+
+
+def _interpolate(x, xs, ys):
+    """
+    Piecewise linear interpolation which extrapolates linearly beyond the sampled range,
+    matching `scipy.interpolate.interp1d(..., fill_value='extrapolate')`.
+    :param x: Point(s) to evaluate.
+    :param xs: Sorted sample points.
+    :param ys: Sample values.
+    :return: Interpolated value(s) as a numpy array.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.interp(x, xs, ys)
+
+    # Extend the first and last segments past the edges of the samples
+    y = np.where(x < xs[0], ys[0] + (x - xs[0]) * (ys[1] - ys[0]) / (xs[1] - xs[0]), y)
+    y = np.where(x > xs[-1], ys[-1] + (x - xs[-1]) * (ys[-1] - ys[-2]) / (xs[-1] - xs[-2]), y)
+
+    return y
+
+
+def _success_rate(amount_of_squares: int, num_bombs: int, uncovered_spaces: int):
+    """
+    Probability of uncovering a number of spaces without hitting a bomb,
+    i.e. C(squares - bombs, uncovered) / C(squares, uncovered).
+    :param amount_of_squares: Amount of squares on the board.
+    :param num_bombs: Number of bombs on the board.
+    :param uncovered_spaces: The number of spaces to be cleared.
+    :return: Success probability between 0 and 1.
+    """
+    return comb(amount_of_squares - num_bombs, uncovered_spaces) / comb(amount_of_squares, uncovered_spaces)
+
+
+@dataclass
+class Insights:
+    """
+    Results of a mines game scenario.
+
+    Attributes:
+        - success_rate (float): Percentage of successfully uncovered spaces.
+        - multiplier (float): Predicted multiplier for the scenario.
+        - expected_value (float): The expected value of a specific bet.
+    """
+    success_rate: float = 0
+    multiplier: float = 0.0
+    expected_value: float = 0.0
+
+    @property
+    def failure_rate(self):
+        """
+        Percentage of unsuccessfully uncovered spaces, derived from the success rate so the two never drift apart.
+        """
+        return 100 - self.success_rate
 
 
 class OutcomeAnalyzer:
@@ -29,11 +115,11 @@ class OutcomeAnalyzer:
         - amount_of_squares (int): Amount of squares on the board, 25 by default.
         - bet_amount (float): Amount used as bet, 1 unit ($ or any other currency) by default.
 
-        Results (dict):
-        - Success Rate (float): Percentage of successfully uncovered spaces.
-        - Failure Rate (float): Percentage of unsuccessfully uncovered spaces.
-        - Multiplier (float): Predicted multiplier for the scenario.
-        - Expected Value (float): The expected value of a specific bet.
+        Results (Insights):
+        - success_rate (float): Percentage of successfully uncovered spaces.
+        - failure_rate (float): Percentage of unsuccessfully uncovered spaces.
+        - multiplier (float): Predicted multiplier for the scenario.
+        - expected_value (float): The expected value of a specific bet.
     """
 
     def __init__(self, num_bombs: int, uncovered_spaces: int, bet_amount=1, amount_of_squares=25):
@@ -52,16 +138,16 @@ class OutcomeAnalyzer:
         self.bet_amount = bet_amount
 
         # Results
-        self.insights = {
-            'Success Rate': 0,
-            'Failure Rate': 0,
-            'Multiplier': 0.00,
-            'Expected Value': 0.0
-        }
+        self.insights = Insights()
 
         # Determine spaces covered
         self.covered_spaces = self.amount_of_squares - self.uncovered_spaces
 
+        # Clearing more spaces than there are safe squares always fails, skip the analysis and lose the bet
+        if self.uncovered_spaces > self.amount_of_squares - self.num_bombs:
+            self.insights = Insights(success_rate=0.0, multiplier=0.0, expected_value=-1.0)
+            return
+
         # Determine success and failure rates
         self.calculate_success_failure_rates()
 
@@ -79,16 +165,11 @@ class OutcomeAnalyzer:
             - Success Rate (float): Percentage of successfully uncovered spaces.
             - Failure Rate (float): Percentage of unsuccessfully uncovered spaces.
         """
-        # Calculate success rate using functools.reduce
-        success_rate = reduce(
-            lambda x, i: x * ((self.amount_of_squares - self.num_bombs - i) / (self.amount_of_squares - i)),
-            range(self.uncovered_spaces),
-            1
-        )
+        # Calculate success rate as the chance that every uncovered space is drawn from the safe ones
+        success_rate = _success_rate(self.amount_of_squares, self.num_bombs, self.uncovered_spaces)
 
-        # Save the values in the insight dictionary
-        self.insights['Success Rate'] = success_rate * 100
-        self.insights['Failure Rate'] = 100 - self.insights['Success Rate']
+        # Save the value in the insights, the failure rate is derived from it
+        self.insights.success_rate = float(success_rate * 100)
 
     def predict_multiplier(self):
         """
@@ -102,40 +183,15 @@ class OutcomeAnalyzer:
             - Multiplier (float): Predicted multiplier for the scenario.
         """
 
-        def load_sample_data_packet(num_bombs: int):
-            """
-            Function that receives number of bombs as input,
-            then compares with the manually calculated data to output sample uncovered spaces and the multipliers.
-            :param num_bombs: Number of bombs in the scenario.
-            :return: data_packets (dict) contain sample uncovered spaces and the multipliers
-            """
-            smcd = crp.read_encrypted('assets/dmsc.crypt', '-%nPGS;GIC,2x}2I')
-
-            # Create a dictionary to store the manually collected data
-            data_packets = {}
-
-            # Iterate over unique int values
-            for unique_int in smcd['A'].unique():
-                # Create a new dataframe for the unique value
-                temp_ednt = smcd[smcd['A'] == unique_int][['B', 'C']]
-
-                # Update the data packet dict
-                # num_bombs is the key, then sample uncovered spaces and multipliers are the values.
-                data_packets[unique_int] = temp_ednt
-
-            return data_packets[num_bombs]
-
-        # Identify number of bombs to load the appropriate sample data packet
-        data_packet = load_sample_data_packet(self.num_bombs)
-        print(data_packet)
-
-        # Define Predict Function with manually collected samples, uses `scipy.interpolate.interp1d`
-        # B for Number of uncovered spaces, C for collected payouts
-        predictor = interpolate.interp1d(x=data_packet['B'], y=data_packet['C'],
-                                         fill_value='extrapolate')
+        # Identify number of bombs to load the appropriate lookup table
+        lut = _load_packets()[self.num_bombs]
 
-        # Predict the multiplier given the covered spaces
-        self.insights['Multiplier'] = float(predictor(self.covered_spaces))
+        # Read the multiplier for the covered spaces off the table, falling back to
+        # interpolating between its entries for spaces it does not hold
+        if 0 <= self.covered_spaces < lut.size and self.covered_spaces == int(self.covered_spaces):
+            self.insights.multiplier = float(lut[int(self.covered_spaces)])
+        else:
+            self.insights.multiplier = float(_interpolate(self.covered_spaces, np.arange(lut.size), lut))
 
     def calculate_expected_value(self):
         """
@@ -143,7 +199,6 @@ class OutcomeAnalyzer:
 
         Uses:
             - Success Rate
-            - Failure Rate
             - Multiplier
             - Bet amount
 
@@ -151,13 +206,61 @@ class OutcomeAnalyzer:
             - Expected Value (float): The expected value of a specific bet.
         """
         # Retrieve needed parameters
-        prob_of_winning = self.insights['Success Rate'] / 100
-        prob_of_losing = self.insights['Failure Rate'] / 100
-        multiplier = self.insights['Multiplier']
+        prob_of_winning = self.insights.success_rate / 100
+        multiplier = self.insights.multiplier
         bet_amount = self.bet_amount
 
-        # Determine the expected value of the bet
-        expected_value = ((prob_of_winning * (multiplier - bet_amount)) + (prob_of_losing * -bet_amount)) / bet_amount
+        # Determine the expected value of the bet, p * (m - b) + (1 - p) * -b per unit bet simplifies to p * m / b - 1
+        expected_value = (prob_of_winning * multiplier) / bet_amount - 1
 
         # Store the expected value of the bet
-        self.insights['Expected Value'] = expected_value
+        self.insights.expected_value = expected_value
+
+
+@lru_cache(maxsize=None)
+def compute_grid(amount_of_squares=25, bet_amount=1):
+    """
+    Computes success rates, multipliers and expected values for every sampled number of bombs
+    and every number of uncovered spaces at once, using numpy broadcasting instead of one OutcomeAnalyzer per pair.
+
+    The tables are cached, so single scenarios can be read off them with an index lookup.
+    :param amount_of_squares: Amount of squares on the board, 25 by default.
+    :param bet_amount: Amount used as bet, 1 unit ($ or any other currency) by default.
+    :return: grid (dict) holding the 'Bombs' and 'Uncovered Spaces' axes, and a read-only table
+             per insight indexed as [bombs row, uncovered spaces].
+    """
+    packets = _load_packets()
+    bombs = np.array(sorted(packets))
+    uncovered = np.arange(amount_of_squares + 1)
+
+    # Chance of each successive pick being safe, clipped so boards without enough safe squares stay at 0
+    picks = np.arange(amount_of_squares)[None, :]
+    ratios = np.maximum((amount_of_squares - bombs[:, None] - picks) / (amount_of_squares - picks), 0)
+
+    # Success rate for uncovering U spaces is the product of the first U ratios
+    prob_of_winning = np.ones((bombs.size, uncovered.size))
+    prob_of_winning[:, 1:] = np.cumprod(ratios, axis=1)
+
+    # Multipliers are tabulated against covered spaces, interpolate each bomb count's row
+    covered = amount_of_squares - uncovered
+    multiplier = np.vstack([_interpolate(covered, np.arange(packets[num_bombs].size), packets[num_bombs])
+                            for num_bombs in bombs])
+
+    # Like OutcomeAnalyzer, scenarios clearing more spaces than there are safe squares pay nothing
+    multiplier[uncovered[None, :] > amount_of_squares - bombs[:, None]] = 0
+
+    expected_value = (prob_of_winning * multiplier) / bet_amount - 1
+
+    grid = {
+        'Bombs': bombs,
+        'Uncovered Spaces': uncovered,
+        'Success Rate': prob_of_winning * 100,
+        'Multiplier': multiplier,
+        'Expected Value': expected_value
+    }
+
+    # The tables are shared between callers through the cache
+    for table in grid.values():
+        table.setflags(write=False)
+
+    return grid
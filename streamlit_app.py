@@ -9,11 +9,23 @@ James Kola
 """
 
 # Required imports
-import pandas as pd
-
-from outcome_evaluation import *
 import streamlit as st
-import plotly.express as px
+from outcome_evaluation import Insights, OutcomeAnalyzer
+
+
+@st.cache_data
+def compute_insights(num_bombs: int, uncovered: int, bet: float, squares: int) -> Insights:
+    """
+    Analyze a scenario once per distinct set of inputs, so reruns with previously seen values are served from cache
+    :param num_bombs: Number of mines on the board
+    :param uncovered: Desired no of spaces to be cleared
+    :param bet: Bet amount
+    :param squares: Total number of squares
+    :return: insights (Insights) of the scenario
+    """
+    scenario = OutcomeAnalyzer(num_bombs=num_bombs, uncovered_spaces=uncovered,
+                               bet_amount=bet, amount_of_squares=squares)
+    return scenario.insights
 
 # ==================================================================#
 #                          Streamlit Code                           #
@@ -28,20 +40,28 @@ st.write(description)
 with st.container():
     st.subheader('Game Options')
 
-    # Number of squares
-    amount_of_squares = st.number_input('Number of Squares on the Board', value=25)
+    # Group the inputs in a form so changing several of them triggers a single rerun on submit
+    with st.form('scenario'):
+        # Number of squares
+        amount_of_squares = st.number_input('Number of Squares on the Board', value=25)
+
+        # Bet amount
+        bet_amount = st.number_input('Enter your bet amount (in your unit currency):', value=1)
 
-    # Bet amount
-    bet_amount = st.number_input('Enter your bet amount (in your unit currency):', value=1)
+        # Mines on board
+        num_mines = st.slider("Select the number of mines on the board:", min_value=2, max_value=24, step=1)
 
-    # Mines on board
-    num_mines = st.slider("Select the number of mines on the board:", min_value=2, max_value=24, step=1)
+        # Spaces to be cleared
+        spaces_cleared = st.number_input('Enter the desired number of spaces to be cleared:',
+                                         min_value=0,
+                                         max_value=25,
+                                         step=1)
 
-    # Spaces to be cleared
-    spaces_cleared = st.number_input('Enter the desired number of spaces to be cleared:',
-                                     min_value=0,
-                                     max_value=25,
-                                     step=1)
+        submitted = st.form_submit_button('Analyze')
+
+    # Remember the submission, so reruns from widgets outside the form keep showing the results
+    if submitted:
+        st.session_state['analyzed'] = True
 
     def calculate_and_visualize(numbr_mines, spaces_uncovered, bet__amount, no_of_squares):
         """
@@ -51,48 +71,63 @@ with st.container():
         :param bet__amount: Bet amount
         :param no_of_squares: Total number of squares, 25 by default
         """
-        scenario = OutcomeAnalyzer(num_bombs=numbr_mines, uncovered_spaces=spaces_uncovered,
-                                   bet_amount=bet__amount, amount_of_squares=no_of_squares)
-        insights = scenario.insights
+        insights = compute_insights(numbr_mines, spaces_uncovered, bet__amount, no_of_squares)
+
+        # Round the rates once and reuse them for the text and charts
+        success_rate = round(insights.success_rate, 3)
+        failure_rate = round(insights.failure_rate, 3)
 
         # Display success and failure rates
         st.subheader('Success and Failure Rates')
         st.write(
-            f'The probability of successfully clearing {spaces_cleared} spaces with {num_mines} mines is {np.round(insights["Success Rate"], 3)}%. '
-            f'The chance of failure is {np.round(insights["Failure Rate"], 3)}%. Visualize the rates below:')
-
-        # Pie chart visualization
-        labels = [f'Success Rate ({np.round(insights["Success Rate"], 3)}%)',
-                  f'Failure Rate ({np.round(insights["Failure Rate"], 3)}%)']
-        sizes = [np.round(insights["Success Rate"], 3), np.round(insights["Failure Rate"], 3)]
-
-        fig1 = px.pie(names=labels, values=sizes, color=labels,
-                      color_discrete_map={
-                          f'Success Rate ({np.round(insights["Success Rate"], 3)}%)': '#2CA02C',
-                          f'Failure Rate ({np.round(insights["Failure Rate"], 3)}%)': '#D62728'
-                      })
-
-        fig1.update_layout(
-            legend=dict(
-                font=dict(color='red'),
-                bgcolor="rgba(255, 255, 255, 0.8)"
-            )
-        )
-
-        st.plotly_chart(fig1, theme="streamlit", use_container_width=True)
+            f'The probability of successfully clearing {spaces_cleared} spaces with {num_mines} mines is {success_rate}%. '
+            f'The chance of failure is {failure_rate}%. Visualize the rates below:')
+
+        # Native widgets convey the two rates without building a chart
+        col1, col2 = st.columns(2)
+        col1.metric('Success', f'{success_rate}%')
+        col2.metric('Failure', f'{failure_rate}%')
+        st.progress(success_rate / 100)
+
+        # Pie chart visualization, only built when requested since expander contents always run
+        with st.expander('Detailed chart'):
+            if st.checkbox('Show pie chart'):
+                # plotly is imported here to keep it off the app's cold start
+                import plotly.express as px
+
+                success_label = f'Success Rate ({success_rate}%)'
+                failure_label = f'Failure Rate ({failure_rate}%)'
+                labels = [success_label, failure_label]
+                sizes = [success_rate, failure_rate]
+
+                fig1 = px.pie(names=labels, values=sizes, color=labels,
+                              color_discrete_map={
+                                  success_label: '#2CA02C',
+                                  failure_label: '#D62728'
+                              })
+
+                fig1.update_layout(
+                    legend=dict(
+                        font=dict(color='red'),
+                        bgcolor="rgba(255, 255, 255, 0.8)"
+                    )
+                )
+
+                st.plotly_chart(fig1, theme="streamlit", use_container_width=True)
 
         # Display expected payout
         st.subheader('Expected Payout')
-        st.write(f'This scenario has an expected multiplier of {insights["Multiplier"]}x')
+        st.write(f'This scenario has an expected multiplier of {insights.multiplier}x')
 
         # Display expected value
         st.subheader('Expected Value')
-        st.write(f'In this scenario, the expected value is {np.round(insights["Expected Value"] * 100, 4)}%')
+        st.write(f'In this scenario, the expected value is {round(insights.expected_value * 100, 4)}%')
 
         # Disclaimer
         st.subheader('Disclaimer⚠')
         st.write('This tool is intended for recreational and educational purposes only. The calculations and predictions provided are based on simulated\n'
                  'scenarios and should not be considered financial or gaming advice. Users are encouraged to use their discretion when making decisions related to real-world scenarios.')
 
-    # Analyze the scenario
-    calculate_and_visualize(num_mines, spaces_cleared, bet_amount, amount_of_squares)
+    # Analyze the submitted scenario
+    if st.session_state.get('analyzed'):
+        calculate_and_visualize(num_mines, spaces_cleared, bet_amount, amount_of_squares)